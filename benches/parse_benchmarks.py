@@ -2,25 +2,55 @@
 """
 Benchmark Results Parser
 
-This script reads benchmark result files from the res/ directory and creates
-a pandas DataFrame with file size, initialization time, FK20 time, and proving time.
+This script reads benchmark result files from the prover/ (--prover) or
+verifier/ (--verifier) directory and creates a LaTeX table with the timings
+averaged per file size.
 """
 
 import argparse
-import re
+import mmap
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, reduce
 from pathlib import Path
-from typing import Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-import pandas as pd
-from humanfriendly import format_timespan, parse_size, parse_timespan
+import numpy as np
 
 FILE_SIZE_COLUMN = "File Size [KiB]"
 
+_PROVER_TAGS = (b"File size:", b"FK20 time:", b"Proving time:")
+_VERIFIER_TAGS = (b"Verification took:",)
 
+# Size of each unit in KiB, covering the units printed by the benchmarks
+_SIZE_UNITS_KIB = {
+    "B": 1 / 1024,
+    "KiB": 1,
+    "MiB": 1024,
+    "GiB": 1024 * 1024,
+    "KB": 1000 / 1024,
+    "MB": 1000 * 1000 / 1024,
+    "GB": 1000 * 1000 * 1000 / 1024,
+}
+
+# Parsed results keyed by (path, mtime in ns, size in bytes)
+CacheKey = Tuple[str, int, int]
+CACHE_DIR = Path(".cache")
+
+
+@lru_cache(maxsize=None)
 def parse_file_size(size_str: str) -> Optional[int]:
     """
     Parse file size string like '128 KiB' or '1 MiB' and return size in KiB as integer.
     """
+    try:
+        value, unit = size_str.split()
+        return int(float(value) * _SIZE_UNITS_KIB[unit])
+    except (KeyError, ValueError):
+        pass
+    from humanfriendly import parse_size
+
     try:
         # parse_size returns bytes, convert to KiB
         size_bytes = parse_size(size_str)
@@ -29,16 +59,55 @@ def parse_file_size(size_str: str) -> Optional[int]:
         return None
 
 
+@lru_cache(maxsize=None)
 def parse_time(time_str: str) -> Optional[float]:
     """
     Parse time string and return time in seconds as float.
     """
+    # Fast path for the '<float>s' and '<float>ms' formats printed by the benchmarks
+    time_str = time_str.strip()
+    try:
+        if time_str.endswith("ms"):
+            return float(time_str[:-2]) / 1000.0
+        if time_str.endswith("s"):
+            return float(time_str[:-1])
+    except ValueError:
+        pass
+    from humanfriendly import parse_timespan
+
     try:
         return float(parse_timespan(time_str))
     except Exception:
         return None
 
 
+def read_benchmark_fields(
+    filepath: Union[str, Path], tags: Tuple[bytes, ...]
+) -> Optional[List[str]]:
+    """
+    Return the rest of the line following the first occurrence of each tag,
+    or None if any tag is missing.
+    """
+    with open(filepath, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            return None
+    with mm:
+        values = []
+        for tag in tags:
+            start = mm.find(tag)
+            if start < 0:
+                return None
+            start += len(tag)
+            end = mm.find(b"\n", start)
+            if end < 0:
+                end = len(mm)
+            values.append(mm[start:end].strip().decode("ascii", errors="replace"))
+    return values
+
+
 def parse_prover_benchmark_file(
     filepath: Union[str, Path],
 ) -> Optional[Dict[str, Union[int, float]]]:
@@ -48,30 +117,20 @@ def parse_prover_benchmark_file(
     Returns:
         dict: Dictionary with parsed data or None if parsing fails or any required field is missing
     """
-    with open(filepath, "r") as f:
-        content = f.read()
+    fields = read_benchmark_fields(filepath, _PROVER_TAGS)
+    if fields is None:
+        return None
+    file_size_str, fk20_time_str, proving_time_str = fields
 
-    # Extract file size
-    file_size_match = re.search(r"File size:\s*(.+)", content)
-    file_size = None
-    if file_size_match:
-        file_size = parse_file_size(file_size_match.group(1))
+    file_size = parse_file_size(file_size_str)
     if not file_size:
         return None
 
-    # Extract FK20 time
-    fk20_time_match = re.search(r"FK20 time:\s*(.+)", content)
-    fk20_time = None
-    if fk20_time_match:
-        fk20_time = parse_time(fk20_time_match.group(1))
+    fk20_time = parse_time(fk20_time_str)
     if not fk20_time:
         return None
 
-    # Extract proving time
-    proving_time_match = re.search(r"Proving time:\s*(.+)", content)
-    proving_time = None
-    if proving_time_match:
-        proving_time = parse_time(proving_time_match.group(1))
+    proving_time = parse_time(proving_time_str)
     if not proving_time:
         return None
     mining_time = proving_time - fk20_time
@@ -92,26 +151,25 @@ def parse_verifier_benchmark_file(
     Returns:
         dict: Dictionary with parsed data or None if parsing fails or any required field is missing
     """
-    with open(filepath, "r") as f:
-        content = f.read()
-
     # Extract file size from filename, e.g., out512-3.txt -> 512
-    filename = Path(filepath).name
-    file_size_match = re.match(r"out(\d+)-", filename)
-    if not file_size_match:
+    filename = os.path.basename(filepath)
+    if not filename.startswith("out"):
+        return None
+    end = filename.find("-", 3)
+    if end < 0:
         return None
     try:
-        file_size_kib = int(file_size_match.group(1))
-    except Exception:
+        file_size_kib = int(filename[3:end])
+    except ValueError:
         return None
 
     # Extract verification time (e.g., 'Verification took: 11.865ms')
-    verification_time_match = re.search(r"Verification took:\s*([\d.]+)ms", content)
-    if not verification_time_match:
+    fields = read_benchmark_fields(filepath, _VERIFIER_TAGS)
+    if fields is None or not fields[0].endswith("ms"):
         return None
     try:
-        verification_time_ms = float(verification_time_match.group(1))
-    except Exception:
+        verification_time_ms = float(fields[0][:-2])
+    except ValueError:
         return None
 
     return {
@@ -120,23 +178,58 @@ def parse_verifier_benchmark_file(
     }
 
 
+def cache_key(filepath: Union[str, Path]) -> CacheKey:
+    """
+    Identify a benchmark file by its path, modification time and size.
+    """
+    st = os.stat(filepath)
+    return (str(filepath), st.st_mtime_ns, st.st_size)
+
+
+def cache_version() -> int:
+    """
+    Identify the parser version by the modification time of this script,
+    so that editing the parsers invalidates previously cached results.
+    """
+    return os.stat(__file__).st_mtime_ns
+
+
+def load_cache(cache_file: Path) -> Dict[CacheKey, Any]:
+    """
+    Load previously parsed results, or an empty cache if none can be read
+    or it was written by a different version of this script.
+    """
+    try:
+        with open(cache_file, "rb") as f:
+            version, cache = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, TypeError, ValueError):
+        return {}
+    return cache if version == cache_version() else {}
+
+
+def save_cache(cache_file: Path, cache: Dict[CacheKey, Any]) -> None:
+    """
+    Store parsed results together with the current script version.
+    """
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(cache_file, "wb") as f:
+        pickle.dump((cache_version(), cache), f)
+
+
 # Custom compact formatting for freshness period: e.g. 5h20min
-def compact_timespan(seconds):
-    units = [
-        ("d", 86400),
-        ("h", 3600),
-        ("min", 60),
-        ("s", 1),
-    ]
-    remaining = int(seconds)
-    result = []
-    for name, unit_seconds in units:
-        value, remaining = divmod(remaining, unit_seconds)
-        if value > 0:
-            result.append(f"{value}{name} ")
-        if len(result) == 2:
-            break
-    return "".join(result) if result else "0s"
+def compact_timespan_vec(seconds: np.ndarray) -> np.ndarray:
+    days, remaining = np.divmod(np.asarray(seconds).astype(np.int64), 86400)
+    hours, remaining = np.divmod(remaining, 3600)
+    minutes, secs = np.divmod(remaining, 60)
+    values = np.stack([days, hours, minutes, secs], axis=-1)
+    labels = np.char.add(
+        np.char.add(values.astype(str), np.array(["d", "h", "min", "s"])), " "
+    )
+    # Keep the two most significant nonzero units of each timespan
+    nonzero = values > 0
+    parts = np.where(nonzero & (np.cumsum(nonzero, axis=-1) <= 2), labels, "")
+    result = reduce(np.char.add, np.moveaxis(parts, -1, 0))
+    return np.where(result == "", "0s", result)
 
 
 def main() -> None:
@@ -146,7 +239,7 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Benchmark Results Parser")
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument(
-        "--prover", action="store_true", help="Parse prover benchmarks (from res/)"
+        "--prover", action="store_true", help="Parse prover benchmarks (from prover/)"
     )
     group.add_argument(
         "--verifier",
@@ -155,6 +248,9 @@ def main() -> None:
     )
     args = parser.parse_args()
 
+    # Deferred so that e.g. --help does not pay for importing pandas
+    import pandas as pd
+
     script_dir = Path(__file__).parent
     if args.prover:
         bench_dir = script_dir / "prover"
@@ -165,45 +261,74 @@ def main() -> None:
         print(f"Error: {bench_dir} directory not found!")
         return None
 
-    benchmark_files = list(bench_dir.glob("*.txt"))
+    with os.scandir(bench_dir) as entries:
+        benchmark_files = [
+            entry.path
+            for entry in entries
+            if entry.name.endswith(".txt") and entry.is_file()
+        ]
     if not benchmark_files:
         print(f"No .txt files found in {bench_dir}")
         return None
 
     print(f"Found {len(benchmark_files)} benchmark files:")
 
-    # Parse all files
-    data = []
-    for filepath in benchmark_files:
-        parsed_data = (
-            parse_prover_benchmark_file(filepath)
-            if args.prover
-            else parse_verifier_benchmark_file(filepath)
-        )
+    # Parse all files in parallel, each file is independent
+    parse_file = (
+        parse_prover_benchmark_file if args.prover else parse_verifier_benchmark_file
+    )
+    # Files unchanged since the previous run are taken from the cache
+    mode = "prover" if args.prover else "verifier"
+    cache_file = script_dir / CACHE_DIR / f"parse_benchmarks_{mode}.pkl"
+    cache = load_cache(cache_file)
+    keys = [cache_key(filepath) for filepath in benchmark_files]
+    stale = [key for key in keys if key not in cache]
+    if stale:
+        stale_files = [path for path, _, _ in stale]
+        with ProcessPoolExecutor() as executor:
+            cache.update(
+                zip(stale, executor.map(parse_file, stale_files, chunksize=16))
+            )
+    # Only keep entries for the files that are currently present
+    results = [cache[key] for key in keys]
+    if stale or len(cache) != len(keys):
+        save_cache(cache_file, dict(zip(keys, results)))
+
+    # Aggregate per file size while iterating: metric sums followed by a sample count
+    columns: List[str] = []
+    totals: Dict[int, List[float]] = {}
+    for filepath, parsed_data in zip(benchmark_files, results):
         if parsed_data and parsed_data[FILE_SIZE_COLUMN] is not None:
-            data.append(parsed_data)
+            if not columns:
+                columns = [col for col in parsed_data if col != FILE_SIZE_COLUMN]
+            entry = totals.setdefault(
+                parsed_data[FILE_SIZE_COLUMN], [0.0] * (len(columns) + 1)
+            )
+            for i, col in enumerate(columns):
+                entry[i] += parsed_data[col]
+            entry[-1] += 1
         else:
-            print(f"Warning: Could not parse {filepath.name}")
+            print(f"Warning: Could not parse {os.path.basename(filepath)}")
 
-    if not data:
+    if not totals:
         print("No valid data found!")
         return None
 
-    # Create DataFrame
-    df = pd.DataFrame(data)
-
-    # Group by file size and calculate averages and counts
-    grouped = df.groupby(FILE_SIZE_COLUMN)
-
     # Calculate averages for timing metrics (excluding initialization time)
-    columns = [col for col in df.columns if col != FILE_SIZE_COLUMN]
-    df_averaged = grouped[columns].mean()
+    file_sizes = sorted(totals)
+    sums = np.array([totals[file_size] for file_size in file_sizes])
+    sample_counts = sums[:, -1].astype(np.int64)
+    df_averaged = pd.DataFrame(
+        sums[:, :-1] / sample_counts[:, np.newaxis],
+        columns=columns,
+        index=pd.Index(file_sizes, name=FILE_SIZE_COLUMN),
+    )
 
     if args.prover:
         # Add freshness period column directly (formatted)
-        df_averaged["Freshness period"] = (
-            df_averaged["Mining Time [s]"] * 2 * 1e5
-        ).apply(compact_timespan)
+        df_averaged["Freshness period"] = compact_timespan_vec(
+            df_averaged["Mining Time [s]"].to_numpy() * 2 * 1e5
+        )
         columns.append("Freshness period")
 
     print("\n" + "=" * 60)
@@ -211,17 +336,14 @@ def main() -> None:
     print("=" * 60)
     print(df_averaged.to_string())
 
-    # Get sample counts for caption and validation
-    sample_counts = grouped.size()
-
     # Check if all file sizes have the same number of samples
-    unique_counts = sample_counts.unique()
+    unique_counts = np.unique(sample_counts)
     if len(unique_counts) == 1:
         sample_count = unique_counts[0]
         print(f"\nAll file sizes have {sample_count} samples each.")
     else:
         print(f"\nError: Sample counts differ across file sizes:")
-        for file_size, count in sample_counts.items():
+        for file_size, count in zip(file_sizes, sample_counts):
             print(f"  {file_size} KiB: {count} samples")
         print("Error: all file sizes must have the same number of samples.")
         return None
@@ -238,16 +360,12 @@ def main() -> None:
         output_file = script_dir / "benchmark_results_prover.tex"
     else:
         output_file = script_dir / "benchmark_results_verifier.tex"
-    df_final.to_latex(output_file, column_format=col_format, float_format="%.2f")
-
-    # Add a comment at the top of the LaTeX file
-    with open(output_file, "r+") as f:
-        content = f.read()
-        f.seek(0, 0)
-        f.write(
-            "% Automatically generated by parse_benchmarks.py\n% DO NOT EDIT MANUALLY\n\n"
-            + content
-        )
+    # Render in memory so the header comment and table are written at once
+    latex = df_final.to_latex(column_format=col_format, float_format="%.2f")
+    output_file.write_text(
+        "% Automatically generated by parse_benchmarks.py\n% DO NOT EDIT MANUALLY\n\n"
+        + latex
+    )
     print(f"\nAveraged results saved to: {output_file}")
 
 